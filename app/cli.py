@@ -0,0 +1,89 @@
+"""Commandes d'administration, hors du démarrage de l'API.
+
+Usage :
+    python -m app.cli migrate
+    python -m app.cli import-csv [--path data/movies.csv]
+    python -m app.cli import-users users.csv [--batch-size 1000] [--workers 8]
+
+Le CSV d'utilisateurs a pour en-têtes email,password[,role].
+"""
+import argparse
+import csv
+
+
+def locked_migrate():
+    """Migration sous le même verrou fichier que les workers (voir app.coordination)"""
+    from app.coordination import run_once
+    from app.migrations import migrate
+
+    applied = []
+    run_once("migrate", lambda: applied.append(migrate()))
+    return applied[-1]
+
+
+def cmd_migrate(args):
+    from app.migrations import SCHEMA_VERSION
+
+    if locked_migrate():
+        print(f"Schéma migré en version {SCHEMA_VERSION}")
+    else:
+        print(f"Schéma déjà à jour (version {SCHEMA_VERSION})")
+
+
+def cmd_import_csv(args):
+    from app.coordination import run_once
+    from app.csv_loader import import_csv_to_db, CSV_PATH
+
+    locked_migrate()
+    # Même verrou que l'import au démarrage des workers : le test "table vide" puis l'insertion restent atomiques
+    run_once("import", lambda: import_csv_to_db(args.path or CSV_PATH))
+
+
+def cmd_import_users(args):
+    import multiprocessing
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from app.database import SessionLocal
+    from app.crud import bulk_create_users
+
+    locked_migrate()
+    with open(args.path, newline="", encoding="utf-8") as f:
+        users = [
+            {"email": row["email"].strip(), "password": row["password"], "role": (row.get("role") or "user").strip()}
+            for row in csv.DictReader(f)
+            if row.get("email") and row.get("password")
+        ]
+
+    workers = args.workers or os.cpu_count() or 1
+    db = SessionLocal()
+    try:
+        # "spawn" : les processus de hachage n'héritent ni des threads ni des connexions SQLite
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = bulk_create_users(db, users, batch_size=args.batch_size, pool=pool, workers=workers)
+    finally:
+        db.close()
+    print(f"{result['created']} utilisateur(s) créé(s), {len(result['skipped'])} ignoré(s) (email existant)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Administration de l'API Movies")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help="Crée ou met à jour le schéma de la base").set_defaults(func=cmd_migrate)
+
+    import_parser = subparsers.add_parser("import-csv", help="Importe le CSV si la table movies est vide")
+    import_parser.add_argument("--path", help="Chemin du CSV (défaut: data/movies.csv)")
+    import_parser.set_defaults(func=cmd_import_csv)
+
+    users_parser = subparsers.add_parser("import-users", help="Crée des utilisateurs en masse depuis un CSV")
+    users_parser.add_argument("path", help="CSV avec les colonnes email,password[,role]")
+    users_parser.add_argument("--batch-size", type=int, default=1000, help="Utilisateurs par transaction")
+    users_parser.add_argument("--workers", type=int, default=None, help="Processus de hachage (défaut: un par cœur)")
+    users_parser.set_defaults(func=cmd_import_users)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus, un seul worker attendu
+    fcntl = None
+
+from app.database import engine
+
+# Temps maximal d'attente du verrou de démarrage (secondes)
+STARTUP_LOCK_TIMEOUT_SECONDS = 600
+
+
+def lock_path(name: str) -> str:
+    """Fichier de verrou placé à côté de la base SQLite (ou dans /tmp pour une base en mémoire)"""
+    database = engine.url.database
+    if database and database != ":memory:":
+        return f"{os.path.abspath(database)}.{name}.lock"
+    return os.path.join(tempfile.gettempdir(), f"movies-api.{name}.lock")
+
+
+@contextmanager
+def file_lock(name: str, blocking: bool = True, timeout: float = STARTUP_LOCK_TIMEOUT_SECONDS):
+    """Verrou exclusif entre processus (flock).
+
+    Produit True si le verrou est obtenu. En mode non bloquant, produit False
+    immédiatement si un autre processus le détient.
+    """
+    if fcntl is None:
+        yield True
+        return
+
+    fd = os.open(lock_path(name), os.O_RDWR | os.O_CREAT, 0o644)
+    acquired = False
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                acquired = True
+                break
+            except BlockingIOError:
+                if not blocking:
+                    break
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Verrou '{name}' non obtenu après {timeout}s")
+                time.sleep(0.1)
+        yield acquired
+    finally:
+        if acquired:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def run_once(name: str, task):
+    """Exécute `task` dans un seul worker à la fois.
+
+    Le premier worker qui obtient le verrou (le leader) exécute la tâche ;
+    les autres attendent qu'il ait terminé puis l'exécutent à leur tour,
+    ce qui est sans effet pour une tâche idempotente (migration, import
+    dans une base déjà remplie). Retourne True pour le leader.
+    """
+    with file_lock(name, blocking=False) as leader:
+        if leader:
+            task()
+            return True
+
+    with file_lock(name):
+        task()
+    return False
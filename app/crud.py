@@ -1,6 +1,10 @@
 from sqlalchemy import and_, asc, desc
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from .models import Movie, User
+from .health import movie_counter
+from .movie_index import movie_index
+from .similarity import similarity_index
 from werkzeug.security import generate_password_hash, check_password_hash
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -10,6 +14,7 @@ from fastapi import HTTPException, status
 SECRET_KEY = "votre_cle_secrete_super_securisee_changez_moi"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+USER_IMPORT_BATCH_SIZE = 1000
 
 # Fonctions pour les films (existantes)
 def get_movies(session: Session, filters: dict):
@@ -55,6 +60,13 @@ def get_movies(session: Session, filters: dict):
 def get_movie(session: Session, movie_id: int):
     return session.query(Movie).filter(Movie.id == movie_id).first()
 
+def get_movies_by_ids(session: Session, movie_ids: list):
+    """Films correspondant aux ids, en une seule requête IN (dict id -> film)"""
+    if not movie_ids:
+        return {}
+    movies = session.query(Movie).filter(Movie.id.in_(movie_ids)).all()
+    return {movie.id: movie for movie in movies}
+
 def create_movie(session: Session, movie_data: dict):
     title = movie_data.get("title")
     year = movie_data.get("year")
@@ -74,6 +86,9 @@ def create_movie(session: Session, movie_data: dict):
     session.add(movie)
     session.commit()
     session.refresh(movie)
+    movie_counter.add(1)
+    movie_index.upsert(movie)
+    similarity_index.upsert(movie)
 
     return movie
 
@@ -88,6 +103,8 @@ def update_movie(session: Session, movie_id: int, movie_data: dict):
 
     session.commit()
     session.refresh(movie)
+    movie_index.upsert(movie)
+    similarity_index.upsert(movie)
 
     return movie
 
@@ -98,6 +115,9 @@ def delete_movie(session: Session, movie_id: int):
 
     session.delete(movie)
     session.commit()
+    movie_counter.add(-1)
+    movie_index.delete(movie_id)
+    similarity_index.delete(movie_id)
     return True
 
 # NOUVELLES Fonctions pour l'authentification (avec werkzeug)
@@ -126,6 +146,78 @@ def create_user(db: Session, user_data: dict):
     db.refresh(user)
     return user
 
+def list_users(db: Session, limit: int, after_id: int | None = None,
+               role: str | None = None, email_prefix: str | None = None):
+    """Page d'utilisateurs triés par id (pagination par curseur, sans OFFSET).
+
+    Retourne (utilisateurs, dernier id si une page suivante existe).
+    """
+    query = db.query(User.id, User.email, User.role)
+    if role:
+        query = query.filter(User.role == role)
+    if email_prefix:
+        # Intervalle plutôt que LIKE : SQLite peut alors utiliser l'index unique sur email
+        query = query.filter(User.email >= email_prefix, User.email < email_prefix + "\U0010ffff")
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+
+    rows = query.order_by(User.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (rows[-1].id if has_more else None)
+
+def hash_passwords(passwords: list, pool=None, workers: int = 1):
+    """Hache les mots de passe, répartis sur `workers` processus de `pool` si fourni"""
+    if pool is None:
+        return [generate_password_hash(password) for password in passwords]
+    chunksize = max(len(passwords) // (workers * 4), 1)
+    return list(pool.map(generate_password_hash, passwords, chunksize=chunksize))
+
+def bulk_create_users(db: Session, users: list, batch_size: int = USER_IMPORT_BATCH_SIZE,
+                      pool=None, workers: int = 1):
+    """Crée des utilisateurs par lots : hachage (en parallèle si pool), une transaction par lot.
+
+    Les emails déjà présents (en base, plus haut dans la liste, ou insérés
+    entre-temps par une autre requête) sont ignorés.
+    Retourne {"created": nombre, "skipped": [emails]}.
+    """
+    created = 0
+    skipped = []
+    seen = set()
+
+    for start in range(0, len(users), batch_size):
+        batch = users[start:start + batch_size]
+        emails = [user["email"] for user in batch]
+        existing = {email for (email,) in db.query(User.email).filter(User.email.in_(emails))}
+        # Fin de la transaction de lecture : la connexion n'est pas gardée pendant le hachage
+        db.rollback()
+
+        to_create = []
+        for user in batch:
+            if user["email"] in existing or user["email"] in seen:
+                skipped.append(user["email"])
+                continue
+            seen.add(user["email"])
+            to_create.append(user)
+        if not to_create:
+            continue
+
+        hashed = hash_passwords([user["password"] for user in to_create], pool, workers)
+        # ON CONFLICT DO NOTHING : un email créé en parallèle est ignoré au lieu de faire échouer le lot
+        inserted = db.execute(
+            sqlite_insert(User).on_conflict_do_nothing(index_elements=[User.email]).returning(User.email),
+            [
+                {"email": user["email"], "password": password, "role": user.get("role", "user")}
+                for user, password in zip(to_create, hashed)
+            ],
+        ).scalars().all()
+        db.commit()
+        inserted = set(inserted)
+        skipped.extend(user["email"] for user in to_create if user["email"] not in inserted)
+        created += len(inserted)
+
+    return {"created": created, "skipped": skipped}
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
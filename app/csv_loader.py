@@ -1,5 +1,5 @@
 from app.models import Movie
-from app.database import Base, engine, SessionLocal
+from app.database import SessionLocal
 import csv
 import os
 import re
@@ -14,9 +14,13 @@ LOG_FILE = "import_errors.log"
 
 logger = logging.getLogger("movies_import")
 logger.setLevel(logging.INFO)
-fh = logging.FileHandler(LOG_FILE, encoding="utf-8")
-fh.setLevel(logging.INFO)
-logger.addHandler(fh)
+
+def _ensure_log_file():
+    """Ouvre import_errors.log au premier import seulement, pas au chargement du module"""
+    if not any(isinstance(h, logging.FileHandler) for h in logger.handlers):
+        fh = logging.FileHandler(LOG_FILE, encoding="utf-8")
+        fh.setLevel(logging.INFO)
+        logger.addHandler(fh)
 
 def normalize_gross(value):
     if not value:
@@ -47,16 +51,15 @@ def normalize_float(value):
 def is_database_empty(db: Session) -> bool:
     """Vérifie si la table movies contient déjà des données"""
     try:
-        return db.query(Movie).count() == 0
+        return db.query(Movie.id).first() is None
     except:
         
         return True
 
 def import_csv_to_db(csv_path=CSV_PATH):
-    """Charge le CSV seulement si la base est vide"""
+    """Charge le CSV seulement si la base est vide (le schéma doit exister, voir app.migrations)"""
     
     
-    Base.metadata.create_all(bind=engine)
     db: Session = SessionLocal()
     
     
@@ -75,6 +78,7 @@ def import_csv_to_db(csv_path=CSV_PATH):
     print(f"Import des données depuis: {csv_path}")
     inserted = duplicates = logged = 0
 
+    _ensure_log_file()
     logger.info(f"Import started: {datetime.datetime.utcnow().isoformat()}")
 
     try:
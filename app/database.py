@@ -1,9 +1,49 @@
-from sqlalchemy import create_engine
+import os
+import threading
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app import query_stats
 
-SQLITE_URL = "sqlite:///movies.db"
+SQLITE_URL = os.getenv("MOVIES_DATABASE_URL", "sqlite:///movies.db")
 
-engine = create_engine(SQLITE_URL, future=True, echo=False)
+# Plusieurs workers partagent le fichier : on attend un verrou au lieu d'échouer
+engine = create_engine(SQLITE_URL, future=True, echo=False, connect_args={"timeout": 30})
+query_stats.install(engine)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 Base = declarative_base()
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL : les lectures des autres workers ne bloquent plus pendant une écriture
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+# Connexion dédiée à PRAGMA data_version : la valeur n'est comparable que sur une même connexion
+_version_lock = threading.Lock()
+_version_conn = None
+
+def data_version():
+    """Change dès qu'une autre connexion (autre worker, autre requête) a validé une écriture"""
+    global _version_conn
+    with _version_lock:
+        if _version_conn is None:
+            _version_conn = engine.raw_connection()
+            # Hors du pool : elle ne prend pas la place d'une connexion de requête
+            _version_conn.detach()
+        cursor = _version_conn.cursor()
+        try:
+            cursor.execute("PRAGMA data_version")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+def reset_engine_after_fork():
+    """Abandonne les connexions héritées du processus parent (gunicorn --preload, fork)"""
+    global _version_conn
+    engine.dispose(close=False)
+    _version_conn = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_engine_after_fork)
@@ -1,6 +1,8 @@
-from fastapi import Depends, HTTPException, status
+import os
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .database import SessionLocal
+from . import rate_limit
 from jose import JWTError, jwt
 
 # Configuration JWT
@@ -9,6 +11,16 @@ ALGORITHM = "HS256"
 
 security = HTTPBearer()
 
+# Derrière un reverse proxy, l'IP cliente est lue dans X-Forwarded-For.
+# Chaque proxy ajoute à droite l'adresse de son appelant : seules les
+# PROXY_HOPS dernières entrées viennent de nos proxys, les précédentes
+# sont fournies par le client et ne sont pas utilisées.
+# Attention : avec TRUST_PROXY=0 derrière un load balancer, tous les
+# clients ont l'IP du load balancer et partagent le même compteur
+# (la limite "login" s'applique alors à tout le site).
+TRUST_PROXY = os.getenv("MOVIES_API_TRUST_PROXY", "0") == "1"
+PROXY_HOPS = max(int(os.getenv("MOVIES_API_PROXY_HOPS", "1")), 1)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -63,4 +75,35 @@ def require_user_or_admin(user: dict = Depends(get_current_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Action non autorisée"
         )
-    return user
\ No newline at end of file
+    return user
+
+# LIMITATION DE DÉBIT
+def _apply_rate_limit(name: str, identity: str, response: Response):
+    result = rate_limit.check(name, identity)
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de requêtes, réessayez plus tard",
+            headers=result.headers()
+        )
+    response.headers.update(result.headers())
+
+def client_ip(request: Request):
+    if TRUST_PROXY:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            # Entrée ajoutée par le proxy le plus externe : le client ne peut pas la choisir
+            return forwarded[max(len(forwarded) - PROXY_HOPS, 0)]
+    return request.client.host if request.client else "unknown"
+
+def rate_limit_by_user(name: str):
+    """Limite de débit par utilisateur authentifié (clé: sub du JWT)"""
+    def dependency(response: Response, user: dict = Depends(get_current_user)):
+        _apply_rate_limit(name, user["email"], response)
+    return dependency
+
+def rate_limit_by_ip(name: str):
+    """Limite de débit par adresse IP, pour les routes publiques"""
+    def dependency(request: Request, response: Response):
+        _apply_rate_limit(name, client_ip(request), response)
+    return dependency
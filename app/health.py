@@ -0,0 +1,151 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from sqlalchemy import func, select, text
+
+from app.database import engine, SessionLocal
+from app.models import Movie
+
+# Configuration des sondes
+READINESS_TIMEOUT_SECONDS = 1.0
+MOVIE_COUNT_REFRESH_SECONDS = 60
+DEEP_CHECK_MIN_INTERVAL_SECONDS = 10
+
+# Un seul thread suffit : la sonde ne fait qu'un SELECT 1
+_probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-probe")
+_probe_lock = threading.Lock()
+# Sonde en cours : (future, instant de lancement)
+_probe = None
+
+# Levé quand les tâches de démarrage (migration, import) sont terminées dans ce worker
+startup_complete = threading.Event()
+
+
+class MovieCounter:
+    """Nombre de films maintenu en mémoire, mis à jour à chaque écriture
+    et recalculé périodiquement pour corriger une éventuelle dérive."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._refreshed_at = None
+        self.refreshes = 0
+        self.reads = 0
+
+    def get(self):
+        with self._lock:
+            self.reads += 1
+            return self._value
+
+    def refresh(self):
+        """Recalcule le nombre de films (COUNT complet, hors chemin des sondes)"""
+        db = SessionLocal()
+        try:
+            value = db.execute(select(func.count(Movie.id))).scalar_one()
+        finally:
+            db.close()
+        with self._lock:
+            self._value = value
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+        return value
+
+    def add(self, delta: int):
+        with self._lock:
+            if self._value is not None:
+                self._value = max(self._value + delta, 0)
+
+    def age(self):
+        with self._lock:
+            if self._refreshed_at is None:
+                return None
+            return time.monotonic() - self._refreshed_at
+
+    def stats(self):
+        return {
+            "value": self._value,
+            "age_seconds": self.age(),
+            "refreshes": self.refreshes,
+            "reads": self.reads,
+        }
+
+
+movie_counter = MovieCounter()
+
+# Statistiques de cache exposées par le mode deep (nom -> fonction)
+cache_stats_providers = {"movie_count": movie_counter.stats}
+
+
+def register_cache_stats(name: str, provider):
+    """Ajoute une source de statistiques de cache au rapport deep"""
+    cache_stats_providers[name] = provider
+
+
+def _select_one():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def check_database(timeout: float = READINESS_TIMEOUT_SECONDS):
+    """Exécute un SELECT 1 borné dans le temps.
+
+    Une seule sonde à la fois : les appels concurrents attendent le résultat
+    de la sonde en cours au lieu d'empiler des SELECT 1 derrière elle. Le
+    délai court depuis le lancement de cette sonde.
+    Retourne (ok, latence_ms, erreur).
+    """
+    global _probe
+    with _probe_lock:
+        if _probe is None or _probe[0].done():
+            _probe = (_probe_executor.submit(_select_one), time.perf_counter())
+        future, started = _probe
+    try:
+        future.result(timeout=max(started + timeout - time.perf_counter(), 0))
+    except FutureTimeoutError:
+        return False, (time.perf_counter() - started) * 1000, f"timeout après {timeout}s"
+    except Exception as e:
+        return False, (time.perf_counter() - started) * 1000, str(e)
+    return True, (time.perf_counter() - started) * 1000, None
+
+
+def pool_stats():
+    pool = engine.pool
+    stats = {"class": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+_deep_lock = threading.Lock()
+_last_deep_report = None
+_last_deep_at = None
+
+
+def deep_check():
+    """Rapport détaillé, limité à un calcul tous les DEEP_CHECK_MIN_INTERVAL_SECONDS.
+
+    Entre deux calculs, le dernier rapport est renvoyé tel quel.
+    """
+    global _last_deep_report, _last_deep_at
+
+    with _deep_lock:
+        now = time.monotonic()
+        if _last_deep_at is not None and now - _last_deep_at < DEEP_CHECK_MIN_INTERVAL_SECONDS:
+            return {**_last_deep_report, "cached": True}
+
+        ok, latency_ms, error = check_database()
+        report = {
+            "database": {
+                "connected": ok,
+                "latency_ms": round(latency_ms, 3),
+                "error": error,
+            },
+            "pool": pool_stats(),
+            "cache": {name: provider() for name, provider in cache_stats_providers.items()},
+        }
+        _last_deep_report = report
+        _last_deep_at = now
+        return {**report, "cached": False}
@@ -1,27 +1,82 @@
-from fastapi import FastAPI, Depends
-from contextlib import asynccontextmanager
-from app.database import Base, engine
-from app.csv_loader import import_csv_to_db
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager, suppress
+import asyncio
+import os
 from app.routes import router, auth_router, admin_router  # MODIFICATION
 import datetime
-from sqlalchemy.orm import Session
-from app.dependencies import get_db
-from app.models import Movie
+from app.health import movie_counter, check_database, deep_check, startup_complete, MOVIE_COUNT_REFRESH_SECONDS
+from app.coordination import run_once
+from app.movie_index import movie_index, is_enabled as memory_index_enabled
+from app.similarity import similarity_index
+from app import query_stats
+
+# Démarrage : migration du schéma si la base est en retard (PRAGMA user_version, sans scan)
+AUTO_MIGRATE = os.getenv("MOVIES_API_AUTO_MIGRATE", "1") == "1"
+# Import CSV au démarrage : "background" (sans bloquer le service) ou "off" (python -m app.cli import-csv)
+IMPORT_ON_STARTUP = os.getenv("MOVIES_API_IMPORT_ON_STARTUP", "background")
+# Taille maximale d'un corps de requête (octets) : refusé avant toute lecture ou analyse JSON
+MAX_BODY_BYTES = int(os.getenv("MOVIES_API_MAX_BODY_BYTES", str(1024 * 1024)))
+
+async def refresh_movie_count_periodically():
+    """Recalcule le nombre de films en arrière-plan pour que les sondes n'aient jamais à le faire"""
+    while True:
+        try:
+            await asyncio.to_thread(movie_counter.refresh)
+        except Exception as e:
+            print(f"Erreur lors du rafraîchissement du nombre de films: {e}")
+        if memory_index_enabled():
+            try:
+                await asyncio.to_thread(movie_index.refresh)
+            except Exception as e:
+                print(f"Erreur lors du rechargement de l'index mémoire: {e}")
+        if similarity_index.built:
+            try:
+                await asyncio.to_thread(similarity_index.refresh)
+            except Exception as e:
+                print(f"Erreur lors de la reconstruction des recommandations: {e}")
+        await asyncio.sleep(MOVIE_COUNT_REFRESH_SECONDS)
+
+def import_csv_in_background():
+    # Import local : le chargeur CSV n'est utile qu'ici
+    from app.csv_loader import import_csv_to_db
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    print("FastAPI démarre. Initialisation de la base de données...")
-    
-    Base.metadata.create_all(bind=engine)
-    
     try:
-        import_csv_to_db()
-        print("Import CSV terminé avec succès")
+        # Un seul worker importe ; les autres attendent la fin avant de se déclarer prêts
+        if run_once("import", import_csv_to_db):
+            print("Import CSV terminé avec succès")
+        movie_counter.refresh()
+        if memory_index_enabled():
+            movie_index.reload()
     except Exception as e:
         print(f"Erreur lors de l'import CSV: {e}")
+    finally:
+        startup_complete.set()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("FastAPI démarre.")
+
+    startup_complete.clear()
+    if AUTO_MIGRATE:
+        from app.migrations import migrate
+        await asyncio.to_thread(run_once, "migrate", migrate)
+
+    background_tasks = []
+    if IMPORT_ON_STARTUP == "background":
+        background_tasks.append(asyncio.create_task(asyncio.to_thread(import_csv_in_background)))
+    else:
+        startup_complete.set()
+    refresh_task = asyncio.create_task(refresh_movie_count_periodically())
     
     yield 
     
+    refresh_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresh_task
+    # Un import en cours ne peut pas être interrompu : on attend sa fin
+    for task in background_tasks:
+        await task
     print("FastAPI s'arrête.")
 
 app = FastAPI(lifespan=lifespan, title="Movies API", version="1.0.0")
@@ -31,28 +86,78 @@ app.include_router(router)
 app.include_router(auth_router)  # AJOUT
 app.include_router(admin_router)  # AJOUT
 
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    """Compte les requêtes SQL de chaque requête HTTP (en-têtes exposés en mode debug)"""
+    stats, token = query_stats.start_request_stats()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.stop_request_stats(token)
+    query_stats.finish_request(stats)
+
+    route = request.scope.get("route")
+    if route is not None:
+        budget = query_stats.budget_for(request.method, route.path)
+        if budget is not None and stats.count > budget:
+            query_stats.logger.warning(
+                f"Budget SQL dépassé pour {request.method} {route.path}: {stats.count} > {budget}"
+            )
+
+    if query_stats.DEBUG:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.total_ms:.3f}"
+    return response
+
+@app.middleware("http")
+async def limit_body_size(request: Request, call_next):
+    """413 si le Content-Length annoncé dépasse MAX_BODY_BYTES"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Corps de requête trop volumineux (max {MAX_BODY_BYTES} octets)"}
+        )
+    return await call_next(request)
+
 @app.get("/")
 def root():
     return {"message": "Movies API is running"}
 
+@app.get("/health/live")
+def liveness():
+    """Sonde de vivacité : le processus répond, aucun accès à la base"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """Sonde de disponibilité : tâches de démarrage terminées et SELECT 1 borné dans le temps"""
+    if not startup_complete.is_set():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "starting", "database": "unknown"}
+        )
+    ok, latency_ms, error = check_database()
+    if not ok:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": "disconnected", "error": error}
+        )
+    return {"status": "ready", "database": "connected"}
+
 @app.get("/health")
-def health_check(db: Session = Depends(get_db)):
-    """Endpoint de santé de l'API"""
-    try:
-        movie_count = db.query(Movie).count()
-        
-        return {
-            "status": "healthy",
-            "timestamp": datetime.datetime.utcnow().isoformat(),
-            "database": "connected",
-            "movie_count": movie_count,
-            "version": "1.0.0"
-        }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "timestamp": datetime.datetime.utcnow().isoformat(),
-            "database": "disconnected",
-            "error": str(e),
-            "movie_count": 0
-        }
\ No newline at end of file
+def health_check(deep: bool = False):
+    """Endpoint de santé de l'API (nombre de films en cache, ?deep=true pour le détail)"""
+    ok, latency_ms, error = check_database()
+    result = {
+        "status": "healthy" if ok else "unhealthy",
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "database": "connected" if ok else "disconnected",
+        "movie_count": movie_counter.get() or 0,
+        "version": "1.0.0"
+    }
+    if error:
+        result["error"] = error
+    if deep:
+        result["details"] = deep_check()
+    return result
@@ -0,0 +1,51 @@
+from sqlalchemy import text
+
+from app.database import Base, engine
+
+
+def _create_tables(conn):
+    Base.metadata.create_all(bind=conn)
+
+
+def _add_user_listing_indexes(conn):
+    # create_all ne crée pas les index d'une table existante
+    from app.models import User
+    for index in User.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+
+# Étapes de migration, appliquées dans l'ordre : version -> fonction
+MIGRATIONS = {
+    1: _create_tables,
+    2: _add_user_listing_indexes,
+}
+SCHEMA_VERSION = max(MIGRATIONS)
+
+
+def current_version(conn) -> int:
+    """Version du schéma enregistrée dans la base (PRAGMA user_version de SQLite)"""
+    return conn.execute(text("PRAGMA user_version")).scalar_one()
+
+
+def needs_migration() -> bool:
+    with engine.connect() as conn:
+        return current_version(conn) < SCHEMA_VERSION
+
+
+def migrate():
+    """Applique les étapes manquantes puis enregistre la version du schéma.
+
+    Retourne True si une migration a été appliquée.
+    """
+    # Import local : les modèles doivent être enregistrés sur Base.metadata
+    from app import models  # noqa: F401
+
+    with engine.begin() as conn:
+        version = current_version(conn)
+        if version >= SCHEMA_VERSION:
+            return False
+        for step in sorted(MIGRATIONS):
+            if step > version:
+                MIGRATIONS[step](conn)
+        conn.execute(text(f"PRAGMA user_version = {SCHEMA_VERSION}"))
+    return True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, CheckConstraint, Index
 from app.database import Base  
 
 class Movie(Base):
@@ -20,4 +20,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, nullable=False, index=True)
     password = Column(String, nullable=False)
-    role = Column(String, default="user", nullable=False)
\ No newline at end of file
+    role = Column(String, default="user", nullable=False)
+
+    # Listing admin : filtre par rôle puis pagination par id
+    __table_args__ = (Index("ix_users_role_id", "role", "id"),)
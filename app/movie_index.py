@@ -0,0 +1,315 @@
+"""Index en mémoire du catalogue, pour servir GET /movies/ sans SQL.
+
+Les films sont chargés en colonnes NumPy (pas d'objets ORM). Chaque
+instantané (MovieSnapshot) est immuable : une écriture construit un nouvel
+instantané puis remplace la référence d'un coup (copy-on-write), les
+lectures en cours gardent l'ancien.
+
+Les résultats reproduisent crud.get_movies sur SQLite : filtres ILIKE
+(lower() ASCII, jokers % et _), bornes inclusives, tri stable par id
+pour les ex aequo, pagination offset/limit.
+
+Activation : MOVIES_API_MEMORY_INDEX=1 (NumPy requis, importé seulement
+dans ce cas). Avec plusieurs workers, chaque worker a son propre index ;
+la tâche de fond de app.main (MOVIE_COUNT_REFRESH_SECONDS) le recharge
+quand PRAGMA data_version signale une écriture d'une autre connexion.
+"""
+import os
+import re
+import threading
+
+from sqlalchemy import select
+
+from app.database import SessionLocal, data_version
+from app.health import register_cache_stats
+from app.models import Movie
+
+ENABLED = os.getenv("MOVIES_API_MEMORY_INDEX", "0") == "1"
+
+# NumPy (dépendance optionnelle) n'est importé qu'au premier index construit :
+# sans index ni recommandations, le démarrage d'un worker n'en paie pas le coût
+np = None
+
+
+def load_numpy():
+    """Importe NumPy au premier appel ; None s'il n'est pas installé"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+STRING_COLUMNS = ("title", "genre", "studio")
+NUMERIC_COLUMNS = {
+    "id": "int64",
+    "year": "int32",
+    "audience_score": "int32",
+    "rotten_tomatoes": "int32",
+    "profitability": "float64",
+    "worldwide_gross": "float64",
+}
+COLUMNS = ("id",) + STRING_COLUMNS + tuple(c for c in NUMERIC_COLUMNS if c != "id")
+
+# lower() de SQLite (sans ICU) ne convertit que l'ASCII
+_ASCII_LOWER = {c: c + 32 for c in range(ord("A"), ord("Z") + 1)}
+
+
+def ascii_lower(value: str) -> str:
+    return value.translate(_ASCII_LOWER)
+
+
+def ilike_matcher(term: str):
+    """Équivalent Python de `colonne ILIKE '%term%'` sur SQLite"""
+    pattern = ascii_lower(f"%{term}%")
+    if "_" not in term and "%" not in term:
+        needle = ascii_lower(term)
+        return lambda value: needle in value
+    regex = "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern)
+    compiled = re.compile(regex, re.DOTALL)
+    return lambda value: compiled.fullmatch(value) is not None
+
+
+class MovieSnapshot:
+    """Instantané immuable du catalogue, trié par id"""
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.size = len(columns["id"])
+        self.lowered_titles = [ascii_lower(v) for v in columns["title"]]
+        # Index triés (ordre croissant, ex aequo par id) sur les colonnes numériques
+        self.sorted_positions = {
+            name: np.argsort(columns[name], kind="stable") for name in NUMERIC_COLUMNS
+        }
+        # Index inversés : valeur -> positions, pour genre et studio
+        self.inverted = {name: self._invert(columns[name]) for name in ("genre", "studio")}
+        self._order_cache = {}
+
+    @staticmethod
+    def _invert(values):
+        postings = {}
+        for position, value in enumerate(values):
+            postings.setdefault(value, []).append(position)
+        return {value: np.array(positions, dtype="int64") for value, positions in postings.items()}
+
+    @classmethod
+    def from_rows(cls, rows):
+        load_numpy()
+        rows = sorted(rows, key=lambda row: row["id"])
+        columns = {}
+        for name in STRING_COLUMNS:
+            columns[name] = np.array([row[name] for row in rows], dtype=object)
+        for name, dtype in NUMERIC_COLUMNS.items():
+            columns[name] = np.array([row[name] for row in rows], dtype=dtype)
+        return cls(columns)
+
+    def row(self, position: int) -> dict:
+        return {name: self.columns[name][position].item() if name in NUMERIC_COLUMNS
+                else self.columns[name][position] for name in COLUMNS}
+
+    def rows(self):
+        return [self.row(position) for position in range(self.size)]
+
+    def get_many(self, movie_ids) -> dict:
+        """Films trouvés parmi movie_ids (dict id -> ligne), par recherche dichotomique"""
+        ids = np.asarray(list(movie_ids), dtype="int64")
+        positions = np.searchsorted(self.columns["id"], ids)
+        found = {}
+        for movie_id, position in zip(ids.tolist(), positions.tolist()):
+            if position < self.size and self.columns["id"][position] == movie_id:
+                found[movie_id] = self.row(position)
+        return found
+
+    # Copy-on-write : chaque modification produit un nouvel instantané
+    def with_upsert(self, row: dict) -> "MovieSnapshot":
+        position = int(np.searchsorted(self.columns["id"], row["id"]))
+        exists = position < self.size and self.columns["id"][position] == row["id"]
+        columns = {}
+        for name, values in self.columns.items():
+            if exists:
+                values = values.copy()
+                values[position] = row[name]
+            else:
+                values = np.insert(values, position, row[name])
+            columns[name] = values
+        return MovieSnapshot(columns)
+
+    def with_delete(self, movie_id: int) -> "MovieSnapshot":
+        position = int(np.searchsorted(self.columns["id"], movie_id))
+        if position >= self.size or self.columns["id"][position] != movie_id:
+            return self
+        return MovieSnapshot({name: np.delete(values, position) for name, values in self.columns.items()})
+
+    def _range_mask(self, name, low=None, high=None):
+        """Positions dont la colonne est dans [low, high], via l'index trié"""
+        order = self.sorted_positions[name]
+        ordered = self.columns[name][order]
+        start = 0 if low is None else np.searchsorted(ordered, low, side="left")
+        end = self.size if high is None else np.searchsorted(ordered, high, side="right")
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[start:end]] = True
+        return mask
+
+    def _ilike_mask(self, name, term):
+        matches = ilike_matcher(str(term))
+        mask = np.zeros(self.size, dtype=bool)
+        if name in self.inverted:
+            # Une comparaison par valeur distincte, pas par film
+            for value, positions in self.inverted[name].items():
+                if matches(ascii_lower(value)):
+                    mask[positions] = True
+        else:
+            mask[[i for i, value in enumerate(self.lowered_titles) if matches(value)]] = True
+        return mask
+
+    def _ordering(self, field_name, descending):
+        key = (field_name, descending)
+        if key not in self._order_cache:
+            values = self.columns[field_name]
+            if field_name in NUMERIC_COLUMNS:
+                order = self.sorted_positions[field_name]
+                if descending:
+                    order = np.argsort(-values.astype("float64"), kind="stable")
+            else:
+                # sorted(reverse=True) reste stable : les ex aequo gardent l'ordre des id
+                order = np.array(sorted(range(self.size), key=values.__getitem__, reverse=descending),
+                                 dtype="int64")
+            self._order_cache[key] = order
+        return self._order_cache[key]
+
+    def query(self, filters: dict):
+        """Mêmes filtres que crud.get_movies ; None si la requête n'est pas gérée ici"""
+        filters = filters or {}
+        mask = np.ones(self.size, dtype=bool)
+
+        for name in STRING_COLUMNS:
+            if name in filters:
+                mask &= self._ilike_mask(name, filters[name])
+
+        if "year_min" in filters or "year_max" in filters:
+            mask &= self._range_mask("year", filters.get("year_min"), filters.get("year_max"))
+
+        if "min_profitability" in filters:
+            mask &= self._range_mask("profitability", low=filters["min_profitability"])
+
+        positions = None
+        order = filters.get("order_by")
+        if order:
+            desc_mode = order.startswith("-")
+            field_name = order.lstrip('-')
+            if hasattr(Movie, field_name):
+                if field_name not in self.columns:
+                    return None
+                ordering = self._ordering(field_name, desc_mode)
+                positions = ordering[mask[ordering]]
+        if positions is None:
+            positions = np.flatnonzero(mask)
+
+        if "page" in filters and "limit" in filters:
+            offset = max((filters["page"] - 1) * filters["limit"], 0)
+            limit = filters["limit"]
+            positions = positions[offset:] if limit < 0 else positions[offset:offset + limit]
+
+        return [self.row(position) for position in positions]
+
+
+def load_rows():
+    db = SessionLocal()
+    try:
+        result = db.execute(select(*(getattr(Movie, name) for name in COLUMNS)).order_by(Movie.id))
+        return [dict(row._mapping) for row in result]
+    finally:
+        db.close()
+
+
+def movie_to_row(movie) -> dict:
+    return {name: getattr(movie, name) for name in COLUMNS}
+
+
+class MovieIndex:
+    """Détient l'instantané courant ; les écritures sont sérialisées, les lectures sans verrou"""
+
+    def __init__(self):
+        self._write_lock = threading.Lock()
+        self.snapshot = None
+        self.version = None
+        self.reloads = 0
+        self.writes = 0
+        self.queries = 0
+        self.fallbacks = 0
+
+    @property
+    def ready(self):
+        return self.snapshot is not None
+
+    def reload(self):
+        # Chargement hors verrou : les écritures (upsert/delete) ne l'attendent pas
+        version = data_version()
+        writes = self.writes
+        snapshot = MovieSnapshot.from_rows(load_rows())
+        with self._write_lock:
+            if self.writes != writes and self.snapshot is not None:
+                # Écriture appliquée pendant le chargement : l'instantané courant est plus sûr,
+                # version inchangée donc nouvel essai au prochain rafraîchissement
+                return self.snapshot
+            self.snapshot = snapshot
+            self.version = version
+            self.reloads += 1
+            return self.snapshot
+
+    def refresh(self):
+        """Recharge seulement si la base a changé depuis le dernier chargement"""
+        if self.snapshot is not None and self.version == data_version():
+            return False
+        self.reload()
+        return True
+
+    def upsert(self, movie):
+        row = movie_to_row(movie)
+        with self._write_lock:
+            if self.snapshot is not None:
+                self.snapshot = self.snapshot.with_upsert(row)
+                self.writes += 1
+
+    def delete(self, movie_id: int):
+        with self._write_lock:
+            if self.snapshot is not None:
+                self.snapshot = self.snapshot.with_delete(movie_id)
+                self.writes += 1
+
+    def query(self, filters: dict):
+        snapshot = self.snapshot
+        result = snapshot.query(filters) if snapshot is not None else None
+        if result is None:
+            self.fallbacks += 1
+        else:
+            self.queries += 1
+        return result
+
+    def get_many(self, movie_ids):
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        self.queries += 1
+        return snapshot.get_many(movie_ids)
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "enabled": is_enabled(),
+            "size": snapshot.size if snapshot is not None else None,
+            "reloads": self.reloads,
+            "writes": self.writes,
+            "queries": self.queries,
+            "fallbacks": self.fallbacks,
+        }
+
+
+movie_index = MovieIndex()
+register_cache_stats("memory_index", movie_index.stats)
+
+
+def is_enabled():
+    return ENABLED and load_numpy() is not None
@@ -0,0 +1,180 @@
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+logger = logging.getLogger("movies_queries")
+
+# Configuration de l'instrumentation
+DEBUG = os.getenv("MOVIES_API_DEBUG", "0") == "1"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("MOVIES_API_SLOW_QUERY_MS", "100"))
+# Taille maximale des requêtes lentes journalisées (texte SQL et paramètres)
+LOG_MAX_STATEMENT_CHARS = 500
+LOG_MAX_PARAMETERS = 20
+# Tables dont les paramètres ne sont jamais journalisés (emails, hachés de mots de passe)
+SENSITIVE_TABLES = re.compile(r"\busers\b", re.IGNORECASE)
+
+# Nombre maximal de requêtes SQL par endpoint ("METHODE chemin" -> budget)
+QUERY_BUDGETS = {
+    "GET /movies/": 1,
+    "GET /movies/batch": 1,
+    "POST /movies/batch": 1,
+    "GET /movies/{movie_id}": 1,
+    "GET /movies/{movie_id}/similar": 2,
+    "POST /movies/": 3,
+    "PUT /movies/{movie_id}": 6,
+    "PATCH /movies/{movie_id}": 4,
+    "DELETE /movies/{movie_id}": 3,
+    "POST /auth/register": 3,
+    "POST /auth/login": 1,
+    "GET /admin/users": 1,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    """Compteurs de requêtes SQL pour une requête HTTP (ou un bloc de test)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = []
+
+    def record(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements.append(statement)
+
+    def merge(self, other):
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.statements.extend(other.statements)
+
+
+_current_stats = contextvars.ContextVar("query_stats", default=None)
+
+# Budgets actifs (query_budget) : reçoivent les compteurs des requêtes HTTP terminées
+_observers_lock = threading.Lock()
+_observers = []
+
+
+def start_request_stats():
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    return stats, token
+
+
+def stop_request_stats(token):
+    _current_stats.reset(token)
+
+
+def finish_request(stats):
+    """Transmet les compteurs d'une requête HTTP terminée aux budgets actifs"""
+    if _observers:
+        with _observers_lock:
+            for observer in _observers:
+                observer.merge(stats)
+
+
+def explain_query_plan(conn, statement, parameters):
+    """EXPLAIN QUERY PLAN sur un curseur brut, pour ne pas redéclencher les événements"""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"plan indisponible: {e}"]
+
+
+def loggable_query(statement, parameters, executemany):
+    """Texte SQL et paramètres tronqués, paramètres masqués pour les tables sensibles"""
+    sensitive = SENSITIVE_TABLES.search(statement) is not None
+    if len(statement) > LOG_MAX_STATEMENT_CHARS:
+        statement = f"{statement[:LOG_MAX_STATEMENT_CHARS]}... ({len(statement)} caractères)"
+    if sensitive:
+        return statement, "<masqués>"
+    if executemany:
+        return statement, f"<{len(parameters)} lignes>"
+    if isinstance(parameters, (list, tuple)) and len(parameters) > LOG_MAX_PARAMETERS:
+        parameters = f"{list(parameters[:LOG_MAX_PARAMETERS])}... ({len(parameters)} valeurs)"
+    return statement, parameters
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+    if elapsed_ms >= SLOW_QUERY_THRESHOLD_MS:
+        plan = None if executemany else explain_query_plan(conn, statement, parameters)
+        statement, parameters = loggable_query(statement, parameters, executemany)
+        logger.warning(
+            f"Requête lente ({elapsed_ms:.1f} ms): {statement} | paramètres={parameters} | plan={plan}"
+        )
+
+
+def _handle_error(exception_context):
+    # Requête en échec : after_cursor_execute n'est pas appelé, on retire son instant de départ
+    conn = exception_context.connection
+    if conn is not None and exception_context.statement is not None:
+        starts = conn.info.get("query_start_time")
+        if starts:
+            starts.pop()
+
+
+def install(engine):
+    """Branche l'instrumentation sur un engine SQLAlchemy"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def query_budget(max_queries: int, label: str = ""):
+    """Échoue si le bloc exécute plus de max_queries requêtes SQL (utilisé dans les tests).
+
+    Sont comptées les requêtes SQL exécutées directement dans le bloc et
+    celles des requêtes HTTP terminées pendant le bloc (même servies par un
+    autre thread, comme avec un TestClient). Les tâches de fond (comptage
+    des films, index mémoire...) ne sont pas comptées : elles ne s'exécutent
+    ni dans le contexte du bloc ni dans celui d'une requête HTTP.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    with _observers_lock:
+        _observers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _observers_lock:
+            _observers.remove(stats)
+        _current_stats.reset(token)
+    if stats.count > max_queries:
+        detail = "\n".join(stats.statements)
+        raise QueryBudgetExceeded(
+            f"{label or 'bloc'}: {stats.count} requêtes SQL pour un budget de {max_queries}\n{detail}"
+        )
+
+
+def budget_for(method: str, route_path: str):
+    return QUERY_BUDGETS.get(f"{method} {route_path}")
@@ -0,0 +1,122 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import time
+import zlib
+
+# Limites par route : nom -> (nombre de requêtes, période en secondes)
+RATE_LIMITS = {
+    "login": (5, 60),
+    "register": (10, 3600),
+    "movies_read": (120, 60),
+    "movies_write": (30, 60),
+    "admin": (60, 60),
+}
+
+# Surcharge possible : MOVIES_API_RATE_LIMITS="login=10/60,movies_read=300/60"
+for _item in filter(None, os.getenv("MOVIES_API_RATE_LIMITS", "").split(",")):
+    _name, _spec = _item.split("=")
+    _limit, _period = _spec.split("/")
+    RATE_LIMITS[_name.strip()] = (int(_limit), float(_period))
+
+
+class RateLimitResult:
+    def __init__(self, allowed: bool, limit: int, remaining: int, retry_after: float, reset_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.reset_after = reset_after
+
+    def headers(self):
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(int(self.reset_after + 0.999)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(int(self.retry_after + 0.999))
+        return headers
+
+
+class RateLimitBackend(ABC):
+    """Interface des stockages de seaux à jetons.
+
+    Une implémentation partagée (Redis, memcached...) doit garantir que
+    `hit` est atomique pour une clé donnée.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        ...
+
+    @abstractmethod
+    def reset(self):
+        ...
+
+
+class InMemoryTokenBucketBackend(RateLimitBackend):
+    """Seaux à jetons en mémoire, répartis sur plusieurs verrous pour limiter la contention.
+
+    Les compteurs sont propres au processus : avec plusieurs workers,
+    chaque worker applique la limite de son côté. Chaque shard est un LRU
+    borné à max_keys_per_shard : au-delà, les seaux les moins récemment
+    utilisés sont oubliés (un client qui change d'IP sans arrêt ne peut
+    ni faire grossir la mémoire ni ralentir les autres).
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10_000):
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+
+    def _shard(self, key: str):
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def hit(self, key: str, limit: int, period: float) -> RateLimitResult:
+        rate = limit / period
+        now = time.monotonic()
+        lock, buckets = self._shard(key)
+
+        with lock:
+            tokens, updated_at, _, _ = buckets.get(key, (float(limit), now, limit, rate))
+            tokens = min(float(limit), tokens + (now - updated_at) * rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            buckets[key] = (tokens, now, limit, rate)
+            buckets.move_to_end(key)
+
+            while len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=int(tokens),
+            retry_after=0 if allowed else (1 - tokens) / rate,
+            reset_after=(limit - tokens) / rate,
+        )
+
+    def size(self):
+        return sum(len(buckets) for _, buckets in self._shards)
+
+    def reset(self):
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+
+backend: RateLimitBackend = InMemoryTokenBucketBackend()
+
+
+def set_backend(new_backend: RateLimitBackend):
+    """Remplace le stockage (ex: implémentation partagée entre workers)"""
+    global backend
+    backend = new_backend
+
+
+def check(name: str, identity: str) -> RateLimitResult:
+    limit, period = RATE_LIMITS[name]
+    return backend.hit(f"{name}:{identity}", limit, period)
@@ -2,24 +2,31 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 import logging
+import base64
 from datetime import timedelta
 
 from .crud import (
-    get_movies, get_movie, create_movie, update_movie, delete_movie,
-    get_user_by_email, create_user, authenticate_user, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+    get_movies, get_movie, get_movies_by_ids, create_movie, update_movie, delete_movie,
+    get_user_by_email, create_user, authenticate_user, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES,
+    list_users, bulk_create_users
 )
 from .dependencies import get_db, get_current_user, get_current_admin, require_admin, require_user_or_admin  # AJOUT
-from .schema import Movie, MovieCreate, MovieUpdate, VALID_GENRES, UserRegister, UserLogin, Token
-from .models import User
+from .dependencies import rate_limit_by_user, rate_limit_by_ip
+from .schema import Movie, MovieCreate, MovieUpdate, SimilarMovie, MovieBatch, MovieBatchRequest, BATCH_MAX_IDS, VALID_GENRES, UserRegister, UserBulkImport, UserLogin, Token
+from .movie_index import movie_index, movie_to_row, is_enabled as memory_index_enabled
+from .similarity import similarity_index, is_available as similarity_available
 
 logger = logging.getLogger(__name__)
 
+# Plus grand id stockable (INTEGER SQLite / int64 NumPy)
+MOVIE_ID_MAX = 2**63 - 1
+
 router = APIRouter(prefix="/movies", tags=["Movies"])
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
 admin_router = APIRouter(prefix="/admin", tags=["Admin"])
 
 # Routes d'authentification (publiques)
-@auth_router.post("/register", status_code=status.HTTP_201_CREATED)
+@auth_router.post("/register", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit_by_ip("register"))])
 def register(user_data: UserRegister, db: Session = Depends(get_db)):
     user = create_user(db, user_data.model_dump())
     return {
@@ -28,7 +35,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         "role": user.role
     }
 
-@auth_router.post("/login", response_model=Token)
+@auth_router.post("/login", response_model=Token, dependencies=[Depends(rate_limit_by_ip("login"))])
 def login(user_data: UserLogin, db: Session = Depends(get_db)):
     user = authenticate_user(db, user_data.email, user_data.password)
     if not user:
@@ -50,13 +57,30 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     }
 
 # Routes Admin (admin only)
-@admin_router.get("/users")
+def encode_cursor(user_id: int) -> str:
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Curseur de pagination invalide"
+        )
+
+@admin_router.get("/users", dependencies=[Depends(rate_limit_by_user("admin"))])
 def get_all_users(
+    limit: int = Query(50, ge=1, le=500, description="Nombre d'utilisateurs par page"),
+    cursor: str | None = Query(None, description="Curseur renvoyé par la page précédente (next_cursor)"),
+    role: str | None = Query(None, description="Filtrer par rôle (user, admin)"),
+    email_prefix: str | None = Query(None, description="Filtrer par début d'email"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_admin)  # CHANGÉ
 ):
-    """Gérer tous les utilisateurs - Admin only"""
-    users = db.query(User).all()
+    """Gérer tous les utilisateurs (pagination par curseur) - Admin only"""
+    after_id = decode_cursor(cursor) if cursor else None
+    users, last_id = list_users(db, limit, after_id=after_id, role=role, email_prefix=email_prefix)
     return {
         "users": [
             {
@@ -65,10 +89,25 @@ def get_all_users(
                 "role": user.role
             }
             for user in users
-        ]
+        ],
+        "next_cursor": encode_cursor(last_id) if last_id is not None else None
     }
 
-@admin_router.post("/create-admin")
+@admin_router.post("/users/bulk", status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit_by_user("admin"))])
+def import_users(
+    data: UserBulkImport,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_admin)
+):
+    """Créer des utilisateurs en masse (emails existants ignorés ; gros volumes : app.cli import-users) - Admin only"""
+    result = bulk_create_users(db, [user.model_dump() for user in data.users])
+    return {
+        "message": f"{result['created']} utilisateur(s) créé(s)",
+        "created": result["created"],
+        "skipped": result["skipped"]
+    }
+
+@admin_router.post("/create-admin", dependencies=[Depends(rate_limit_by_user("admin"))])
 def create_admin_user(
     user_data: UserRegister,
     db: Session = Depends(get_db),
@@ -88,7 +127,7 @@ def create_admin_user(
 # Routes Movies avec permissions spécifiques
 
 # Voir tous les films - User et Admin
-@router.get("/", response_model=List[Movie])
+@router.get("/", response_model=List[Movie], dependencies=[Depends(rate_limit_by_user("movies_read"))])
 def list_movies(
     title: str | None = None,
     genre: str | None = None,
@@ -121,6 +160,10 @@ def list_movies(
         }
         
         filters = {k: v for k, v in filters.items() if v is not None}
+        if memory_index_enabled() and movie_index.ready:
+            movies = movie_index.query(filters)
+            if movies is not None:
+                return movies
         movies = get_movies(db, filters) 
         return movies
     
@@ -131,8 +174,70 @@ def list_movies(
             detail="Erreur interne du serveur lors de la récupération des films"
         )
 
+def fetch_movie_batch(db: Session, movie_ids: list):
+    """Films dans l'ordre demandé (sans doublons) et ids introuvables"""
+    if len(movie_ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Au plus {BATCH_MAX_IDS} ids par requête"
+        )
+    if any(movie_id <= 0 or movie_id > MOVIE_ID_MAX for movie_id in movie_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Les IDs des films doivent être compris entre 1 et {MOVIE_ID_MAX}"
+        )
+    movie_ids = list(dict.fromkeys(movie_ids))
+
+    found = None
+    if memory_index_enabled() and movie_index.ready:
+        found = movie_index.get_many(movie_ids)
+    if found is None:
+        found = get_movies_by_ids(db, movie_ids)
+
+    return {
+        "movies": [found[movie_id] for movie_id in movie_ids if movie_id in found],
+        "missing": [movie_id for movie_id in movie_ids if movie_id not in found]
+    }
+
+# Voir plusieurs films - User et Admin (déclaré avant /{movie_id})
+@router.get("/batch", response_model=MovieBatch, dependencies=[Depends(rate_limit_by_user("movies_read"))])
+def get_movie_batch(
+    ids: List[str] = Query(..., description="IDs séparés par des virgules (ex: ?ids=3,1,2) ou répétés"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_user_or_admin)
+):
+    """Voir plusieurs films en une requête - User et Admin"""
+    # Taille vérifiée avant toute conversion : une liste énorme est rejetée sans être parsée
+    if sum(value.count(",") + 1 for value in ids) > BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Au plus {BATCH_MAX_IDS} ids par requête"
+        )
+    try:
+        movie_ids = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Les IDs des films doivent être des entiers"
+        )
+    if not movie_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Aucun ID fourni"
+        )
+    return fetch_movie_batch(db, movie_ids)
+
+@router.post("/batch", response_model=MovieBatch, dependencies=[Depends(rate_limit_by_user("movies_read"))])
+def post_movie_batch(
+    data: MovieBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_user_or_admin)
+):
+    """Voir plusieurs films (ids dans le corps) - User et Admin"""
+    return fetch_movie_batch(db, data.ids)
+
 # Voir un film - User et Admin
-@router.get("/{movie_id}", response_model=Movie)
+@router.get("/{movie_id}", response_model=Movie, dependencies=[Depends(rate_limit_by_user("movies_read"))])
 def get_one_movie(
     movie_id: int, 
     db: Session = Depends(get_db),
@@ -153,8 +258,37 @@ def get_one_movie(
         )
     return movie
 
+# Films similaires - User et Admin
+@router.get("/{movie_id}/similar", response_model=List[SimilarMovie], dependencies=[Depends(rate_limit_by_user("movies_read"))])
+def get_similar_movies(
+    movie_id: int,
+    k: int = Query(10, ge=1, le=100, description="Nombre de films similaires"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_user_or_admin)
+):
+    """Films les plus proches (scores, recette, année, genre, studio) - User et Admin"""
+    if not similarity_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Recommandations indisponibles (NumPy non installé)"
+        )
+
+    neighbours = similarity_index.nearest(movie_id, k)
+    if neighbours is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Film avec l'ID {movie_id} introuvable"
+        )
+
+    movies = get_movies_by_ids(db, [neighbour_id for neighbour_id, _ in neighbours])
+    return [
+        {**movie_to_row(movies[neighbour_id]), "distance": distance}
+        for neighbour_id, distance in neighbours
+        if neighbour_id in movies
+    ]
+
 # Ajouter un film - Admin only
-@router.post("/", response_model=Movie, status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=Movie, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit_by_user("movies_write"))])
 def create_new_movie(
     data: MovieCreate, 
     db: Session = Depends(get_db),
@@ -191,7 +325,7 @@ def create_new_movie(
         )
 
 # Modifier un film (PUT) - Admin only
-@router.put("/{movie_id}", response_model=Movie)
+@router.put("/{movie_id}", response_model=Movie, dependencies=[Depends(rate_limit_by_user("movies_write"))])
 def update_one_movie_put(
     movie_id: int, 
     data: MovieCreate, 
@@ -230,7 +364,7 @@ def update_one_movie_put(
             )
 
 # Modifier un film (PATCH) - Admin only
-@router.patch("/{movie_id}", response_model=Movie)
+@router.patch("/{movie_id}", response_model=Movie, dependencies=[Depends(rate_limit_by_user("movies_write"))])
 def update_one_movie(
     movie_id: int, 
     data: MovieUpdate, 
@@ -289,7 +423,7 @@ def update_one_movie(
         )
 
 # Supprimer un film - Admin only
-@router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit_by_user("movies_write"))])
 def remove_movie(
     movie_id: int, 
     db: Session = Depends(get_db),
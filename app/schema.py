@@ -1,9 +1,13 @@
 from pydantic import BaseModel, Field, field_validator, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 # Schémas Movies (existants)
 VALID_GENRES = ["Action", "Drama", "Comedy", "Sci-Fi", "Romance", "Fantasy", "Animation", "Horror", "Thriller"]
+# Nombre maximal d'ids par requête /movies/batch
+BATCH_MAX_IDS = 100
+# Hachage séquentiel dans la requête (~0,1 s par mot de passe) : au-delà, python -m app.cli import-users
+USER_BULK_HTTP_MAX = 50
 
 class MovieBase(BaseModel):
     title: str = Field(..., min_length=2, max_length=120, description="Titre du film")
@@ -65,12 +69,27 @@ class Movie(MovieBase):
     class Config:
         from_attributes = True
 
+class SimilarMovie(Movie):
+    distance: float = Field(..., description="Distance dans l'espace des caractéristiques (plus petit = plus proche)")
+
+class MovieBatchRequest(BaseModel):
+    # Bornes des valeurs vérifiées dans la route (400) : un id hors INTEGER SQLite ferait échouer la requête.
+    # max_length : une liste trop longue est rejetée (422) dès le dépassement, sans valider le reste
+    ids: List[int] = Field(..., min_length=1, max_length=BATCH_MAX_IDS, description="Identifiants des films")
+
+class MovieBatch(BaseModel):
+    movies: List[Movie]
+    missing: List[int]
+
 # NOUVEAUX Schémas d'authentification
 class UserRegister(BaseModel):
     email: EmailStr
     password: str = Field(..., min_length=6)
     role: str = Field(default="user")
 
+class UserBulkImport(BaseModel):
+    users: List[UserRegister] = Field(..., min_length=1, max_length=USER_BULK_HTTP_MAX)
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,43 @@
+"""Lancement de l'API avec plusieurs workers.
+
+Usage :
+    python -m app.serve                      # un worker par cœur
+    WEB_CONCURRENCY=4 python -m app.serve --port 8000
+
+Équivalent gunicorn (les connexions héritées du parent sont abandonnées
+après le fork, voir app.database.reset_engine_after_fork) :
+    gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w $(nproc) --preload
+
+Au démarrage, un seul worker applique la migration et importe le CSV
+(verrou fichier à côté de movies.db, voir app.coordination) ; les autres
+attendent la fin de l'import avant que /health/ready ne réponde 200.
+"""
+import argparse
+import os
+
+# SQLite sérialise les écritures : au-delà d'un worker par cœur, on ajoute surtout de la contention
+MAX_WORKERS = 16
+
+
+def default_workers() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return max(1, min(cores, MAX_WORKERS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.serve", description="Lance l'API Movies en multi-workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    print(f"Démarrage de {args.workers} worker(s) sur {args.host}:{args.port}")
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Recherche des films les plus proches pour GET /movies/{id}/similar.
+
+Chaque film est un vecteur : scores, rentabilité et recette (log), année,
+centrés-réduits, plus un encodage one-hot du genre et du studio. La
+matrice est calculée une fois ; une requête est un seul calcul de
+distances vectorisé (||x||² - 2x·q + ||q||²) suivi d'un argpartition.
+
+Les écritures de crud mettent à jour la matrice en copy-on-write avec les
+paramètres de normalisation existants ; une catégorie inconnue (nouveau
+studio...) déclenche une reconstruction complète à la requête suivante.
+La tâche de fond de app.main ne reconstruit que si PRAGMA data_version
+signale une écriture d'une autre connexion ; la construction se fait hors
+verrou, seul le remplacement de l'instantané est verrouillé.
+Les top-k sont gardés dans un cache LRU vidé à chaque modification.
+"""
+import threading
+from collections import OrderedDict
+
+from app.health import register_cache_stats
+from app.database import data_version
+from app.movie_index import ascii_lower, load_numpy, load_rows, movie_to_row
+
+# Importé à la première construction (voir movie_index.load_numpy)
+np = None
+
+NUMERIC_FEATURES = ("audience_score", "rotten_tomatoes", "profitability", "worldwide_gross", "year")
+# Valeurs très dispersées : comparées en échelle logarithmique
+LOG_FEATURES = ("profitability", "worldwide_gross")
+GENRE_WEIGHT = 1.0
+STUDIO_WEIGHT = 0.5
+CACHE_SIZE = 2048
+
+
+def _category(value: str) -> str:
+    return ascii_lower(value.strip())
+
+
+class FeatureSnapshot:
+    """Matrice de caractéristiques immuable, lignes triées par id"""
+
+    def __init__(self, ids, matrix, params):
+        self.ids = ids
+        self.matrix = matrix
+        self.sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        self.params = params
+
+    @classmethod
+    def build(cls, rows):
+        global np
+        np = load_numpy()
+        rows = sorted(rows, key=lambda row: row["id"])
+        raw = np.array([[row[name] for name in NUMERIC_FEATURES] for row in rows], dtype="float64")
+        raw = raw.reshape(len(rows), len(NUMERIC_FEATURES))
+        for column, name in enumerate(NUMERIC_FEATURES):
+            if name in LOG_FEATURES:
+                raw[:, column] = np.log1p(np.clip(raw[:, column], 0, None))
+        means = raw.mean(axis=0) if len(rows) else np.zeros(len(NUMERIC_FEATURES))
+        stds = raw.std(axis=0) if len(rows) else np.ones(len(NUMERIC_FEATURES))
+        stds[stds == 0] = 1.0
+
+        genres = [_category(row["genre"]) for row in rows]
+        studios = [_category(row["studio"]) for row in rows]
+        params = {
+            "means": means,
+            "stds": stds,
+            "genres": {value: i for i, value in enumerate(sorted(set(genres)))},
+            "studios": {value: i for i, value in enumerate(sorted(set(studios)))},
+        }
+        ids = np.array([row["id"] for row in rows], dtype="int64")
+
+        # Même résultat que vectorize() ligne par ligne, en une passe par bloc de colonnes
+        offset = len(NUMERIC_FEATURES)
+        positions = np.arange(len(rows))
+        matrix = np.zeros((len(rows), cls.dimension(params)), dtype="float32")
+        matrix[:, :offset] = (raw - means) / stds
+        genre_columns = np.array([params["genres"][value] for value in genres], dtype="int64")
+        studio_columns = np.array([params["studios"][value] for value in studios], dtype="int64")
+        matrix[positions, offset + genre_columns] = GENRE_WEIGHT
+        matrix[positions, offset + len(params["genres"]) + studio_columns] = STUDIO_WEIGHT
+        return cls(ids, matrix, params)
+
+    @staticmethod
+    def dimension(params):
+        return len(NUMERIC_FEATURES) + len(params["genres"]) + len(params["studios"])
+
+    @staticmethod
+    def vectorize(row, params):
+        """Vecteur d'un film, ou None si son genre / studio n'existe pas dans la matrice"""
+        genre = params["genres"].get(_category(row["genre"]))
+        studio = params["studios"].get(_category(row["studio"]))
+        if genre is None or studio is None:
+            return None
+
+        numeric = np.array([row[name] for name in NUMERIC_FEATURES], dtype="float64")
+        for column, name in enumerate(NUMERIC_FEATURES):
+            if name in LOG_FEATURES:
+                numeric[column] = np.log1p(max(numeric[column], 0))
+        numeric = (numeric - params["means"]) / params["stds"]
+
+        offset = len(NUMERIC_FEATURES)
+        vector = np.zeros(FeatureSnapshot.dimension(params), dtype="float32")
+        vector[:offset] = numeric
+        vector[offset + genre] = GENRE_WEIGHT
+        vector[offset + len(params["genres"]) + studio] = STUDIO_WEIGHT
+        return vector
+
+    def position(self, movie_id):
+        position = int(np.searchsorted(self.ids, movie_id))
+        if position < len(self.ids) and self.ids[position] == movie_id:
+            return position
+        return None
+
+    def with_upsert(self, row):
+        vector = self.vectorize(row, self.params)
+        if vector is None:
+            return None
+        position = self.position(row["id"])
+        if position is not None:
+            matrix = self.matrix.copy()
+            matrix[position] = vector
+            return FeatureSnapshot(self.ids, matrix, self.params)
+        position = int(np.searchsorted(self.ids, row["id"]))
+        return FeatureSnapshot(np.insert(self.ids, position, row["id"]),
+                               np.insert(self.matrix, position, vector, axis=0), self.params)
+
+    def with_delete(self, movie_id):
+        position = self.position(movie_id)
+        if position is None:
+            return self
+        return FeatureSnapshot(np.delete(self.ids, position),
+                               np.delete(self.matrix, position, axis=0), self.params)
+
+    def nearest(self, movie_id, k):
+        """Liste de (id, distance) des k plus proches voisins, None si le film est absent"""
+        position = self.position(movie_id)
+        if position is None:
+            return None
+        query = self.matrix[position]
+        distances = self.sq_norms - 2 * (self.matrix @ query) + self.sq_norms[position]
+        distances[position] = np.inf
+        k = min(k, len(self.ids) - 1)
+        if k <= 0:
+            return []
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.lexsort((self.ids[candidates], distances[candidates]))]
+        return [(int(self.ids[i]), float(np.sqrt(max(distances[i], 0.0)))) for i in candidates]
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Une seule construction à la fois, hors de _lock : écritures et lectures ne l'attendent pas
+        self._build_lock = threading.Lock()
+        self.snapshot = None
+        self.version = None
+        self._needs_rebuild = False
+        self._writes = 0
+        self._cache = OrderedDict()
+        self.rebuilds = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def built(self):
+        return self.snapshot is not None
+
+    def rebuild(self, only_if_stale: bool = False):
+        with self._build_lock:
+            if only_if_stale and self.snapshot is not None and not self._needs_rebuild:
+                return
+            version = data_version()
+            writes = self._writes
+            snapshot = FeatureSnapshot.build(load_rows())
+            with self._lock:
+                if self._writes != writes and self.snapshot is not None and not self._needs_rebuild:
+                    # Écriture appliquée pendant la construction : l'instantané courant la contient,
+                    # version inchangée donc nouvel essai au prochain rafraîchissement
+                    return
+                self.snapshot = snapshot
+                self.version = version
+                # Une écriture non appliquée pendant la construction peut manquer : on recommencera
+                self._needs_rebuild = self._writes != writes
+                self._cache.clear()
+                self.rebuilds += 1
+
+    def refresh(self):
+        """Reconstruit seulement si la base a changé depuis la dernière construction"""
+        if self.snapshot is not None and self.version == data_version():
+            return False
+        self.rebuild()
+        return True
+
+    def upsert(self, movie):
+        with self._lock:
+            if self.snapshot is None:
+                return
+            self._writes += 1
+            snapshot = self.snapshot.with_upsert(movie_to_row(movie))
+            if snapshot is None:
+                self._needs_rebuild = True
+            else:
+                self.snapshot = snapshot
+            self._cache.clear()
+
+    def delete(self, movie_id):
+        with self._lock:
+            if self.snapshot is None:
+                return
+            self._writes += 1
+            self.snapshot = self.snapshot.with_delete(movie_id)
+            self._cache.clear()
+
+    def nearest(self, movie_id, k):
+        if self.snapshot is None or self._needs_rebuild:
+            self.rebuild(only_if_stale=True)
+
+        key = (movie_id, k)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            snapshot = self.snapshot
+
+        self.misses += 1
+        result = snapshot.nearest(movie_id, k)
+        with self._lock:
+            # Une écriture entre-temps a remplacé l'instantané : ne pas mettre en cache un résultat périmé
+            if result is not None and snapshot is self.snapshot:
+                self._cache[key] = result
+                if len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return result
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "size": len(snapshot.ids) if snapshot is not None else None,
+            "dimensions": snapshot.matrix.shape[1] if snapshot is not None else None,
+            "rebuilds": self.rebuilds,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+similarity_index = SimilarityIndex()
+register_cache_stats("similar_movies", similarity_index.stats)
+
+
+def is_available():
+    return load_numpy() is not None
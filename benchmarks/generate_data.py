@@ -0,0 +1,85 @@
+"""Générateur de données synthétiques au format de data/movies.csv.
+
+Usage :
+    python -m benchmarks.generate_data --rows 100000 --output /tmp/movies_100k.csv
+
+Les lignes sont dérivées des films réels (mêmes genres, studios et formats
+de valeurs, y compris "$41.94 " et quelques lignes invalides) avec un
+suffixe numérique qui garantit l'unicité de title+year.
+"""
+import argparse
+import csv
+import random
+from pathlib import Path
+
+from app.schema import VALID_GENRES
+
+BASE_DIR = Path(__file__).parent.parent
+SOURCE_CSV = BASE_DIR / "data" / "movies.csv"
+
+FIELDNAMES = [
+    "Film", "Genre", "Lead Studio", "Audience score %", "Profitability",
+    "Rotten Tomatoes %", "Worldwide Gross", "Year",
+]
+
+# Proportion de lignes volontairement invalides (champ manquant, année illisible)
+INVALID_RATIO = 0.01
+
+
+def load_templates(source=SOURCE_CSV):
+    with open(source, newline="", encoding="utf-8") as f:
+        return [row for row in csv.DictReader(f) if row.get("Film")]
+
+
+def generate_rows(rows: int, seed: int = 42, source=SOURCE_CSV):
+    """Produit `rows` lignes au format CSV source (générateur, mémoire constante)"""
+    rng = random.Random(seed)
+    templates = load_templates(source)
+    # Les fautes du CSV source (Comdy, Romence) feraient échouer la validation des réponses
+    genres = sorted({t["Genre"] for t in templates if t["Genre"].strip().title() in VALID_GENRES})
+    studios = sorted({t["Lead Studio"] for t in templates})
+
+    for i in range(rows):
+        template = templates[i % len(templates)]
+        row = {
+            "Film": f"{template['Film']} #{i}",
+            "Genre": rng.choice(genres),
+            "Lead Studio": rng.choice(studios),
+            "Audience score %": str(rng.randint(0, 100)),
+            "Profitability": f"{rng.uniform(0, 20):.6f}",
+            "Rotten Tomatoes %": f"{rng.randint(0, 100)}%",
+            "Worldwide Gross": f"${rng.uniform(0.5, 3000):,.2f} ",
+            "Year": str(rng.randint(1980, 2024)),
+        }
+        if rng.random() < INVALID_RATIO:
+            if rng.random() < 0.5:
+                row["Lead Studio"] = ""
+            else:
+                row["Year"] = "n/a"
+        yield row
+
+
+def write_csv(output, rows: int, seed: int = 42):
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        for row in generate_rows(rows, seed):
+            writer.writerow(row)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un CSV de films synthétique")
+    parser.add_argument("--rows", type=int, default=10_000, help="Nombre de lignes (10^4 à 10^7)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    path = write_csv(args.output, args.rows, args.seed)
+    print(f"{args.rows} lignes écrites dans {path}")
+
+
+if __name__ == "__main__":
+    main()
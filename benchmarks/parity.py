@@ -0,0 +1,114 @@
+"""Vérification de parité entre l'index mémoire et crud.get_movies (SQL).
+
+Usage :
+    python -m benchmarks.parity --rows 5000
+
+Une grille de filtres, tris et paginations est exécutée par les deux
+chemins sur une base temporaire, puis après une série d'écritures
+(création, mise à jour, suppression) pour vérifier la mise à jour
+copy-on-write de l'index. Code de sortie 1 à la première divergence.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.generate_data import write_csv
+
+TEXT_FILTERS = [
+    {},
+    {"title": "love"},
+    {"title": "THE"},
+    {"title": "a_e"},
+    {"title": "%"},
+    {"title": "zzz-aucun"},
+    {"genre": "comedy"},
+    {"genre": "ROM"},
+    {"studio": "fox"},
+    {"studio": "Bros."},
+]
+NUMERIC_FILTERS = [
+    {},
+    {"year_min": 2000},
+    {"year_max": 1995},
+    {"year_min": 2005, "year_max": 2010},
+    {"min_profitability": 5.5},
+]
+ORDERS = [None, "year", "-year", "title", "-title", "-worldwide_gross", "audience_score",
+          "-rotten_tomatoes", "profitability", "studio", "-id", "inconnu"]
+PAGES = [None, (1, 10), (3, 7), (50, 100), (10**6, 10)]
+
+
+def cases():
+    for text, numeric, order, page in itertools.product(TEXT_FILTERS, NUMERIC_FILTERS, ORDERS, PAGES):
+        filters = {**text, **numeric}
+        if order:
+            filters["order_by"] = order
+        if page:
+            filters["page"], filters["limit"] = page
+        yield filters
+
+
+def check_all(db, index):
+    from app.crud import get_movies
+    from app.movie_index import movie_to_row
+
+    checked = 0
+    for filters in cases():
+        expected = [movie_to_row(movie) for movie in get_movies(db, filters)]
+        actual = index.query(filters)
+        if actual != expected:
+            print(f"Divergence pour {filters}:")
+            print(f"  SQL     ({len(expected)}): {[m['id'] for m in expected[:20]]}")
+            print(f"  mémoire ({len(actual)}): {[m['id'] for m in actual[:20]]}")
+            return False
+        checked += 1
+    print(f"{checked} cas identiques")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parité index mémoire / SQL")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="movies-parity-"))
+    os.environ["MOVIES_DATABASE_URL"] = f"sqlite:///{workdir / 'parity.db'}"
+    os.chdir(workdir)
+
+    from app import crud
+    from app.csv_loader import import_csv_to_db
+    from app.database import SessionLocal
+    from app.migrations import migrate
+    from app.movie_index import movie_index
+
+    migrate()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import_csv_to_db(write_csv(workdir / "movies.csv", args.rows))
+    movie_index.reload()
+
+    db = SessionLocal()
+    try:
+        if not check_all(db, movie_index):
+            sys.exit(1)
+
+        created = crud.create_movie(db, {
+            "title": "A Love Parity", "year": 2007, "genre": "Comedy", "studio": "Fox",
+            "audience_score": 77, "profitability": 6.0, "rotten_tomatoes": 12, "worldwide_gross": 99.0,
+        })
+        crud.update_movie(db, 1, {"title": "The Updated Love", "year": 2008, "profitability": 9.5})
+        crud.delete_movie(db, 2)
+        crud.delete_movie(db, created.id - 1)
+        print("Après écritures :")
+        if not check_all(db, movie_index):
+            sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
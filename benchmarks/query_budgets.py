@@ -0,0 +1,134 @@
+"""Vérification des budgets de requêtes SQL (app.query_stats.QUERY_BUDGETS).
+
+Usage :
+    python -m benchmarks.query_budgets --rows 2000 [--memory-index]
+
+Chaque route de QUERY_BUDGETS est appelée sur une base temporaire sous
+query_budget(...), l'application tournant avec son lifespan (tâche de
+rafraîchissement en fond comprise). Une route absente de la liste
+d'appels est aussi une erreur. Code de sortie 1 si un budget est dépassé.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.generate_data import write_csv
+
+ADMIN_EMAIL = "budget-admin@example.com"
+USER_EMAIL = "budget-user@example.com"
+PASSWORD = "budget-password"
+
+MOVIE = {
+    "title": "Budget Movie", "year": 2012, "genre": "Drama", "studio": "Budget",
+    "audience_score": 60, "profitability": 2.0, "rotten_tomatoes": 55, "worldwide_gross": 10.0,
+}
+
+
+def prepare_database(workdir: Path, rows: int):
+    from app.crud import create_user
+    from app.csv_loader import import_csv_to_db
+    from app.database import SessionLocal
+    from app.migrations import migrate
+
+    migrate()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import_csv_to_db(write_csv(workdir / "movies.csv", rows))
+    db = SessionLocal()
+    try:
+        create_user(db, {"email": ADMIN_EMAIL, "password": PASSWORD, "role": "admin"})
+        create_user(db, {"email": USER_EMAIL, "password": PASSWORD, "role": "user"})
+    finally:
+        db.close()
+
+
+def scenarios(admin, user):
+    """Liste de (route de QUERY_BUDGETS, appel) ; un appel reçoit le client et rend la réponse"""
+    return [
+        ("GET /movies/", lambda c: c.get("/movies/?genre=comedy&year_min=2000&order_by=-audience_score",
+                                         headers=user)),
+        ("GET /movies/batch", lambda c: c.get("/movies/batch?ids=1,2,3,999999", headers=user)),
+        ("POST /movies/batch", lambda c: c.post("/movies/batch", json={"ids": [4, 5, 6]}, headers=user)),
+        ("GET /movies/{movie_id}", lambda c: c.get("/movies/7", headers=user)),
+        ("GET /movies/{movie_id}/similar", lambda c: c.get("/movies/8/similar?k=5", headers=user)),
+        ("POST /movies/", lambda c: c.post("/movies/", json=MOVIE, headers=admin)),
+        ("PUT /movies/{movie_id}", lambda c: c.put("/movies/9", json={**MOVIE, "title": "Budget Put"},
+                                                   headers=admin)),
+        ("PATCH /movies/{movie_id}", lambda c: c.patch("/movies/10", json={"year": 2001}, headers=admin)),
+        ("DELETE /movies/{movie_id}", lambda c: c.delete("/movies/11", headers=admin)),
+        ("POST /auth/register", lambda c: c.post("/auth/register", json={
+            "email": "budget-new@example.com", "password": PASSWORD})),
+        ("POST /auth/login", lambda c: c.post("/auth/login", json={"email": USER_EMAIL, "password": PASSWORD})),
+        ("GET /admin/users", lambda c: c.get("/admin/users?limit=10", headers=admin)),
+    ]
+
+
+async def check_budgets():
+    import httpx
+    from app.crud import create_access_token
+    from app.health import startup_complete
+    from app.main import app
+    from app.query_stats import QUERY_BUDGETS, QueryBudgetExceeded, budget_for, query_budget
+
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': ADMIN_EMAIL, 'role': 'admin'})}"}
+    user = {"Authorization": f"Bearer {create_access_token({'sub': USER_EMAIL, 'role': 'user'})}"}
+
+    failures = []
+    # Le lifespan tourne hors de tout budget : ses tâches de fond ne doivent pas être comptées
+    async with app.router.lifespan_context(app):
+        await asyncio.to_thread(startup_complete.wait)
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://budget") as client:
+            # Premier appel hors budget : construction de la matrice des recommandations
+            await client.get("/movies/1/similar", headers=user)
+
+            for route, call in scenarios(admin, user):
+                method, path = route.split(" ", 1)
+                budget = budget_for(method, path)
+                try:
+                    with query_budget(budget, route) as stats:
+                        response = await call(client)
+                except QueryBudgetExceeded as e:
+                    failures.append(str(e))
+                    print(f"ÉCHEC {route}: budget {budget} dépassé")
+                    continue
+                if response.status_code >= 400:
+                    failures.append(f"{route}: statut {response.status_code} {response.text[:200]}")
+                    print(f"ÉCHEC {route}: statut {response.status_code}")
+                    continue
+                print(f"ok    {route:35s} {stats.count}/{budget} requête(s)")
+
+    missing = sorted(set(QUERY_BUDGETS) - {route for route, _ in scenarios(admin, user)})
+    for route in missing:
+        failures.append(f"{route}: aucun appel dans benchmarks/query_budgets.py")
+        print(f"ÉCHEC {route}: route non vérifiée")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification des budgets de requêtes SQL")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--memory-index", action="store_true", help="Active MOVIES_API_MEMORY_INDEX")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="movies-budgets-"))
+    os.environ["MOVIES_DATABASE_URL"] = f"sqlite:///{workdir / 'budgets.db'}"
+    os.environ["MOVIES_API_MEMORY_INDEX"] = "1" if args.memory_index else "0"
+    os.environ["MOVIES_API_RATE_LIMITS"] = ",".join(
+        f"{name}=1000000000/1" for name in ("login", "register", "movies_read", "movies_write", "admin"))
+    os.chdir(workdir)
+
+    prepare_database(workdir, args.rows)
+    failures = asyncio.run(check_budgets())
+    if failures:
+        print("\n\n".join(failures))
+        sys.exit(1)
+    print("Tous les budgets sont respectés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Banc de performance de l'API Movies et de l'import CSV.
+
+Usage :
+    python -m benchmarks.run --rows 10000 --output benchmarks/results/latest.json
+    python -m benchmarks.run --compare ancien.json nouveau.json --threshold 0.10
+
+Chaque exécution travaille sur une base SQLite temporaire alimentée par
+benchmarks.generate_data ; data/movies.csv et movies.db ne sont pas touchés.
+En mode --compare, le code de sortie vaut 1 si un scénario est plus lent
+que le seuil toléré (comparaison des médianes).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.generate_data import write_csv
+
+ADMIN_EMAIL = "bench-admin@example.com"
+USER_EMAIL = "bench-user@example.com"
+PASSWORD = "benchmark"
+
+
+def summarize(samples_ms):
+    samples = sorted(samples_ms)
+    total_s = sum(samples) / 1000
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+        "max_ms": samples[-1],
+        "ops_per_sec": len(samples) / total_s if total_s else None,
+    }
+
+
+def measure(fn, repeat: int, number: int = 1):
+    """Chronomètre `repeat` lots de `number` appels ; les durées sont ramenées à un appel"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    return summarize(samples)
+
+
+def bench_import(csv_path):
+    from app.csv_loader import import_csv_to_db
+    from app.migrations import migrate
+
+    migrate()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import_csv_to_db(csv_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {"import_csv_to_db": summarize([elapsed_ms])}
+
+
+def bench_normalizers(repeat: int, number: int = 1000):
+    from app.csv_loader import normalize_gross, normalize_percent, normalize_float
+
+    return {
+        "normalize_gross": measure(lambda: normalize_gross("$1,041.94 "), repeat, number),
+        "normalize_percent": measure(lambda: normalize_percent("64%"), repeat, number),
+        "normalize_float": measure(lambda: normalize_float("1.747541667"), repeat, number),
+        "normalize_invalid": measure(lambda: normalize_float("n/a"), repeat, number),
+    }
+
+
+def bench_crud(repeat: int, rows: int):
+    from app import crud
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        deep_page = max(rows // 100, 1)
+        results = {
+            "crud.get_movie": measure(lambda: crud.get_movie(db, rows // 2), repeat),
+            "crud.get_movies.page1": measure(
+                lambda: crud.get_movies(db, {"page": 1, "limit": 10}), repeat),
+            "crud.get_movies.deep_page": measure(
+                lambda: crud.get_movies(db, {"page": deep_page, "limit": 100}), repeat),
+            "crud.get_movies.title": measure(
+                lambda: crud.get_movies(db, {"title": "love", "page": 1, "limit": 10}), repeat),
+            "crud.get_movies.filters_sorted": measure(
+                lambda: crud.get_movies(db, {
+                    "genre": "Comedy", "year_min": 2000, "year_max": 2010,
+                    "order_by": "-worldwide_gross", "page": 1, "limit": 10,
+                }), repeat),
+        }
+
+        counter = iter(range(10**9))
+
+        def create_and_delete():
+            movie = crud.create_movie(db, {
+                "title": f"Bench movie {next(counter)}", "year": 2015, "genre": "Drama",
+                "studio": "Bench", "audience_score": 50, "profitability": 1.0,
+                "rotten_tomatoes": 50, "worldwide_gross": 1.0,
+            })
+            crud.delete_movie(db, movie.id)
+
+        results["crud.create_delete"] = measure(create_and_delete, max(repeat // 10, 1))
+        return results
+    finally:
+        db.close()
+
+
+def create_bench_users():
+    from app.crud import create_user
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        create_user(db, {"email": ADMIN_EMAIL, "password": PASSWORD, "role": "admin"})
+        create_user(db, {"email": USER_EMAIL, "password": PASSWORD, "role": "user"})
+    finally:
+        db.close()
+
+
+async def load(client, requests: int, concurrency: int, make_request):
+    """Lance `requests` appels avec `concurrency` clients simultanés"""
+    samples = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            response = await make_request(client, i)
+            samples.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - start
+
+    result = summarize(samples)
+    result["throughput_rps"] = requests / wall_s if wall_s else None
+    result["status_codes"] = {str(k): v for k, v in statuses.items()}
+    return result
+
+
+async def bench_http(requests: int, concurrency: int, rows: int):
+    import httpx
+    from app.crud import create_access_token
+    from app.main import app
+
+    create_bench_users()
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': ADMIN_EMAIL, 'role': 'admin'})}"}
+    user = {"Authorization": f"Bearer {create_access_token({'sub': USER_EMAIL, 'role': 'user'})}"}
+
+    def get(url, headers=user):
+        return lambda client, i: client.get(url, headers=headers)
+
+    scenarios = {
+        "http.list.page1": get("/movies/?page=1&limit=10"),
+        "http.list.page10": get("/movies/?page=10&limit=100"),
+        "http.list.deep_page": get(f"/movies/?page={max(rows // 100, 1)}&limit=100"),
+        "http.list.title": get("/movies/?title=love"),
+        "http.list.genre_year_sorted": get("/movies/?genre=comedy&year_min=2000&order_by=-audience_score"),
+        "http.get_one": get(f"/movies/{max(rows // 2, 1)}"),
+        "http.health": get("/health", headers={}),
+    }
+
+    async def login(client, i):
+        return await client.post("/auth/login", json={"email": USER_EMAIL, "password": PASSWORD})
+
+    async def admin_write(client, i):
+        response = await client.post("/movies/", headers=admin, json={
+            "title": f"Bench HTTP {i}", "year": 2015, "genre": "Drama", "studio": "Bench",
+            "audience_score": 50, "profitability": 1.0, "rotten_tomatoes": 50,
+            "worldwide_gross": 1.0,
+        })
+        if response.status_code == 201:
+            return await client.delete(f"/movies/{response.json()['id']}", headers=admin)
+        return response
+
+    results = {}
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, make_request in scenarios.items():
+            results[name] = await load(client, requests, concurrency, make_request)
+        # Le hachage du mot de passe domine : moins d'appels suffisent
+        results["http.login"] = await load(client, max(requests // 10, 1), concurrency, login)
+        results["http.admin_create_delete"] = await load(
+            client, max(requests // 10, 1), concurrency, admin_write)
+    return results
+
+
+def run(args):
+    output = Path(args.output).resolve()
+    workdir = Path(tempfile.mkdtemp(prefix="movies-bench-"))
+    os.environ["MOVIES_DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    # Les limites de débit fausseraient la charge : on les rend inatteignables
+    os.environ["MOVIES_API_RATE_LIMITS"] = ",".join(
+        f"{name}=1000000000/1" for name in ("login", "register", "movies_read", "movies_write", "admin"))
+    # import_errors.log est relatif au répertoire courant : on le garde hors du dépôt
+    os.chdir(workdir)
+
+    print(f"Génération de {args.rows} lignes dans {workdir}")
+    csv_path = write_csv(workdir / "movies.csv", args.rows, args.seed)
+
+    results = {}
+    results.update(bench_import(csv_path))
+    results.update(bench_normalizers(args.repeat))
+    results.update(bench_crud(args.repeat, args.rows))
+    results.update(asyncio.run(bench_http(args.requests, args.concurrency, args.rows)))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "rows": args.rows,
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name, stats in results.items():
+        print(f"{name:40s} p50={stats['p50_ms']:10.4f} ms  p95={stats['p95_ms']:10.4f} ms")
+    print(f"Résultats écrits dans {output}")
+
+
+def compare(baseline_path, current_path, threshold: float):
+    """Compare deux rapports ; retourne la liste des scénarios en régression"""
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+    current = json.loads(Path(current_path).read_text(encoding="utf-8"))["results"]
+
+    regressions = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            print(f"{name:40s} {'absent de ' + ('la référence' if name not in baseline else 'la mesure'):>30s}")
+            continue
+        old, new = baseline[name]["p50_ms"], current[name]["p50_ms"]
+        ratio = new / old if old else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "RÉGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "amélioration"
+        print(f"{name:40s} {old:10.4f} -> {new:10.4f} ms  ({ratio - 1:+7.1%}) {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de l'API Movies")
+    parser.add_argument("--rows", type=int, default=10_000, help="Taille du jeu de données (10^4 à 10^7)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=50, help="Répétitions des micro-benchmarks")
+    parser.add_argument("--requests", type=int, default=200, help="Requêtes HTTP par scénario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--compare", nargs=2, metavar=("REFERENCE", "MESURE"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="Tolérance de régression (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} régression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        return
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
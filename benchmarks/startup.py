@@ -0,0 +1,92 @@
+"""Mesure du démarrage à froid : lancement du processus -> première réponse.
+
+Usage :
+    python -m benchmarks.startup --runs 5 --budget-ms 1500
+
+Chaque essai lance un interpréteur neuf qui importe app.main, exécute le
+lifespan puis sert GET /health/ready. La base est préparée (migration et
+import) une fois pour toutes avant les mesures : on mesure le coût payé
+par chaque worker à chaque redémarrage. Code de sortie 1 si la médiane
+dépasse le budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+
+# Budget par défaut du démarrage à froid (médiane, en millisecondes)
+STARTUP_BUDGET_MS = 1500
+
+PREPARE = "from app.cli import main; main(['import-csv'])"
+
+FIRST_RESPONSE = """
+import asyncio, json, time
+import httpx
+from app.main import app
+
+async def main():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health/ready")
+        print(json.dumps({"ready_at": time.time(), "status": response.status_code}), flush=True)
+
+asyncio.run(main())
+"""
+
+
+def child_env(workdir: Path):
+    env = dict(os.environ)
+    env["MOVIES_DATABASE_URL"] = f"sqlite:///{workdir / 'startup.db'}"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BASE_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def measure_once(workdir: Path):
+    started_at = time.time()
+    process = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE],
+        cwd=workdir, env=child_env(workdir), capture_output=True, text=True, check=True,
+    )
+    line = [l for l in process.stdout.splitlines() if l.startswith("{")][-1]
+    result = json.loads(line)
+    if result["status"] != 200:
+        raise RuntimeError(f"/health/ready a répondu {result['status']}")
+    return (result["ready_at"] - started_at) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid de l'API Movies")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--output", help="Fichier JSON de résultats (optionnel)")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="movies-startup-"))
+    subprocess.run([sys.executable, "-c", PREPARE], cwd=workdir, env=child_env(workdir),
+                   capture_output=True, check=True)
+
+    samples = [measure_once(workdir) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"Démarrage à froid: médiane={median:.1f} ms, min={min(samples):.1f} ms, "
+          f"max={max(samples):.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "samples_ms": samples, "median_ms": median, "budget_ms": args.budget_ms,
+        }, indent=2), encoding="utf-8")
+
+    if median > args.budget_ms:
+        print("Budget de démarrage dépassé")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()